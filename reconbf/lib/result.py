@@ -16,10 +16,25 @@ from .logger import logger
 from . import config
 from . import constants
 
-import cgi
+from collections import namedtuple
 import csv
 import json
+import re
+import shutil
 import subprocess
+import sys
+
+try:
+    from enum import IntEnum
+except ImportError:
+    # python 2 has no enum module, plain class attributes work the same way
+    IntEnum = object
+
+try:
+    from html import escape as _html_escape
+except ImportError:
+    # python 2 only has the escape function from cgi
+    from cgi import escape as _html_escape
 
 """
 Several classes are defined in this module:
@@ -27,8 +42,13 @@ Several classes are defined in this module:
 Result:
     This is used for setting a descriptive value of the outcome of a test.
 
-    This class is basically an ENUM which allows readable values for test
-    results.
+    This class is an ENUM which allows readable values for test results.
+
+
+Confidence:
+    This is used for setting how certain a test is about its result.
+
+    This class is an ENUM which allows readable values for the confidence.
 
 
 ResultDisplayType:
@@ -37,17 +57,21 @@ ResultDisplayType:
     fail.  In some cases though, you'll want to see which tests were skipped
     and why.
 
-    This class is basically an ENUM which allows more nicely readable values
-    for this option.
+    This class is an ENUM which allows more nicely readable values for this
+    option.
 
 
 TestResults:
     An instance of this class is returned as the result of a run of a test set.
 
-    TestResults is a list of test run dictionaries, each contains:
+    TestResults is created from a list of test run dictionaries, each
+    contains:
     - name: a descriptive name of the test
     - result: either a TestResult or GroupTestResult instance
 
+    Internally each test is kept as a _TestEntry(name, result, is_group)
+    namedtuple, where is_group tells whether result is a GroupTestResult.
+
     Once this class has been instantiated it can be used to display the results
     on the command line or output reports.
 
@@ -57,8 +81,9 @@ TestResult:
 
     result - This is an item of type Result which indicates the pass status of
         the test that ran
-    confidence - Indicates how certain recon is about this result. Some tests
-        can only make a good guess.
+    confidence - This is an item of type Confidence which indicates how
+        certain recon is about this result. Some tests can only make a good
+        guess.
     notes - This is an optional text string field which describes any remarks
         that the test added. This is typically used to indicate reasons why a
         test failed or was skipped.
@@ -73,26 +98,34 @@ GroupTestResult:
     - name: a descriptive name of the test
     - result: a TestResult instance
 
+    The items of GroupTestResult.results are namedtuples, so these fields are
+    read as attributes (entry.name, entry.result) rather than by key.
+
 """
 
+# Size of the write buffer used for report files, so that rows are flushed
+# to disk in large chunks rather than one write per row
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Terminal width in the output of 'stty -a', either "columns 80;" (linux) or
+# "80 columns;" (bsd)
+STTY_COLUMNS_RE = re.compile(br'\bcolumns\s+(\d+)|(\d+)\s+columns\b')
 
-class Result:
-    def __init__(self):
-        pass
 
+class Result(IntEnum):
     # Used for indicating the result of a test
     PASS = 1
     FAIL = 2
     SKIP = 3
 
-    CONF_SURE = 1
-    CONF_GUESS = 3
 
+class Confidence(IntEnum):
+    # Used for indicating how certain the result of a test is
+    SURE = 1
+    GUESS = 3
 
-class ResultDisplayType:
-    def __init__(self):
-        pass
 
+class ResultDisplayType(IntEnum):
     # Used for indicating how to display/report test results
     DISPLAY_ALL = 4           # Displays each test
     DISPLAY_NOT_PASS = 3      # Displays each test which isn't pass (fail/skip)
@@ -100,10 +133,59 @@ class ResultDisplayType:
     DISPLAY_OVERALL_ONLY = 1  # Displays only overall result (skip group items)
 
 
-class TestResults:
+# Text used for each result and confidence value in reports
+_RESULT_TEXT = {
+    Result.PASS: "PASS",
+    Result.FAIL: "FAIL",
+    Result.SKIP: "SKIP",
+}
+
+_RESULT_COLOR = {
+    Result.PASS: "pass",
+    Result.FAIL: "fail",
+    Result.SKIP: "skip",
+}
+
+_RESULT_CLASS = {
+    Result.PASS: "test_pass",
+    Result.FAIL: "test_fail",
+    Result.SKIP: "test_skip",
+}
+
+_CONFIDENCE_TEXT = {
+    Confidence.GUESS: "guess",
+    Confidence.SURE: "sure",
+}
+
+# Results listed for each display type. With DISPLAY_OVERALL_ONLY, the top
+# level results are always shown regardless
+_DISPLAYED_RESULTS = {
+    ResultDisplayType.DISPLAY_ALL: frozenset([Result.PASS, Result.FAIL,
+                                              Result.SKIP]),
+    ResultDisplayType.DISPLAY_NOT_PASS: frozenset([Result.FAIL, Result.SKIP]),
+    ResultDisplayType.DISPLAY_FAIL_ONLY: frozenset([Result.FAIL]),
+    ResultDisplayType.DISPLAY_OVERALL_ONLY: frozenset(),
+}
+
+# Entries of TestResults and, for each sub-test, of GroupTestResult
+_TestEntry = namedtuple('_TestEntry', ['name', 'result', 'is_group'])
+_Entry = namedtuple('_Entry', ['name', 'result'])
+
+# on the terminal only guesses are called out
+_TERM_CONFIDENCE_TEXT = {
+    Confidence.SURE: '',
+    Confidence.GUESS: 'guess',
+    None: '',
+}
+
+
+class TestResults(object):
+    __slots__ = ('_results',)
+
     def __init__(self, results_list):
         # Results list is a list of TestResult and GroupTestResult instances
-        self._results = results_list
+        self._results = []
+        self.add_results(results_list)
 
     def add_results(self, new_results):
         """Used for adding a list of one or more TestResult or GroupTestResult
@@ -113,7 +195,68 @@ class TestResults:
         :returns: None
         """
         for result in new_results:
-            self._results.append(result)
+            # note the kind of result once here, so that the report writers
+            # don't have to check the type of every row again
+            self._results.append(_TestEntry(
+                result['name'],
+                result['result'],
+                isinstance(result['result'], GroupTestResult)))
+
+    def _iter_rows(self, display_type=None):
+        """Walk the results in the form shared by all the report writers
+
+        :param display_type: (Optional) ResultDisplayType deciding which
+        results are shown. All results are shown if it's not set.
+        :returns: Generator of (entry, shown, children) tuples. shown tells
+        whether the test itself should be displayed, children is the list of
+        sub-test entries to display for a group, or None for a single test.
+        """
+        if display_type is None:
+            for entry in self._results:
+                children = entry.result.results if entry.is_group else None
+                yield entry, True, children
+            return
+
+        # which results to show only depends on the display type, so
+        # look it up once for the whole report
+        displayed_results = _DISPLAYED_RESULTS[display_type]
+        show_overall = display_type == ResultDisplayType.DISPLAY_OVERALL_ONLY
+
+        for entry in self._results:
+            shown = show_overall or entry.result.result in displayed_results
+
+            children = None
+            if entry.is_group:
+                children = [child for child in entry.result.results
+                            if child.result.result in displayed_results]
+
+            yield entry, shown, children
+
+    def _csv_rows(self):
+        """Generate one row of text fields per test, or per sub-test for
+        group tests
+
+        :returns: Generator of (test name, subtest name, result, notes,
+        confidence) tuples
+        """
+        for test_result, _, sub_results in self._iter_rows():
+            if test_result.is_group:
+                for sub_result in sub_results:
+                    yield (
+                        test_result.name,
+                        sub_result.name,
+                        _result_text(sub_result.result.result),
+                        sub_result.result.notes,
+                        _confidence_text(sub_result.result.confidence),
+                        )
+            else:
+                yield (
+                    test_result.name,
+                    None,
+                    _result_text(test_result.result.result),
+                    test_result.result.notes,
+                    _confidence_text(test_result.result.confidence),
+                    )
 
     def display_on_terminal(self, use_color=True,
                             display_type=ResultDisplayType.DISPLAY_NOT_PASS):
@@ -125,115 +268,90 @@ class TestResults:
         :returns: -
         """
 
-        term_colors = _get_term_colors()
-        term_width = _get_term_width()
+        # field widths, passed to every row as plain values
+        name_width = 60
+        result_width = 9
+        confidence_width = 11
+        total_width = _get_term_width()
+        notes_width = max(total_width - name_width - result_width -
+                          confidence_width, 0)
+        # length of the notes kept in front of '...' when they're cut
+        notes_limit = max(notes_width - 3, 0)
 
-        widths = {'TEST_NAME': 60, 'TEST_RESULT': 9, 'TEST_CONFIDENCE': 11,
-                  'TOTAL': term_width}
-        notes_width = (widths['TOTAL'] - widths['TEST_NAME'] -
-                       widths['TEST_RESULT'] - widths['TEST_CONFIDENCE'])
+        result_cells = _build_result_cells(result_width, use_color)
 
         # used when a test name is longer than the name field, have
         # supporting details on the next line to make output nicer
 
-        # Print header section
-        print('\n')
-        print('=' * widths['TOTAL'])
+        # collect the output lines and write them out in one go at the end,
+        # rather than paying for a write on every row
+        lines = []
 
-        print('{0: <{1}}'.format('Test Name', widths['TEST_NAME']) +
-              '{0: <{1}}'.format('Result', widths['TEST_RESULT']) +
-              '{0: <{1}}'.format('Confidence', widths['TEST_CONFIDENCE']) +
-              'Notes')
-        print('=' * widths['TOTAL'])
+        # Print header section
+        lines.append('\n')
+        lines.append('=' * total_width)
+
+        lines.append('Test Name'.ljust(name_width) +
+                     'Result'.ljust(result_width) +
+                     'Confidence'.ljust(confidence_width) +
+                     'Notes')
+        lines.append('=' * total_width)
+
+        for res, shown, child_list in self._iter_rows(display_type):
+            # decide whether to display, based on mode
+            if not shown:
+                continue
 
-        for res in self._results:
-            if isinstance(res['result'], TestResult):
+            if not res.is_group:
                 # Handle single result case
+                result_string = _build_result_string(
+                    res.name,
+                    res.result.result,
+                    res.result.confidence,
+                    _truncate_notes(res.result.notes, notes_width,
+                                    notes_limit),
+                    result_cells,
+                    False,
+                    name_width,
+                    result_width,
+                    confidence_width)
+                lines.append(result_string)
 
-                # decide whether to display, based on mode
-                if (_check_display_result(res['result'].result,
-                                          display_type) or
-                        display_type ==
-                        ResultDisplayType.DISPLAY_OVERALL_ONLY):
-
-                    # truncate notes to not overwhelm output
-                    notes = res['result'].notes
-                    if notes and len(notes) > notes_width:
-                        notes = notes[0:notes_width - 3] + '...'
-
-                    result_string = _build_result_string(
-                        res['name'],
-                        res['result'].result,
-                        res['result'].confidence,
-                        notes,
-                        use_color,
-                        term_colors,
-                        False,
-                        widths)
-                    print(result_string)
-
-            elif isinstance(res['result'], GroupTestResult):
-
-                child_results = []
-                result_list = res['result'].results
-
-                for child_res in result_list:
-
-                    # check if we should display, based on the display type
-                    if _check_display_result(child_res['result'].result,
-                                             display_type):
-
-                        # truncate notes to not overwhelm output
-                        notes = child_res['result'].notes
-                        if notes and len(notes) > notes_width:
-                            notes = notes[0:notes_width - 3] + '...'
-
-                        child_results.append(_build_result_string(
-                            child_res['name'],
-                            child_res['result'].result,
-                            child_res['result'].confidence,
-                            notes,
-                            use_color,
-                            term_colors,
-                            True,
-                            widths
-                        ))
-
-                parent_result = res['result'].result
-
-                # check if we should display the parent result based on the
-                # settings
-                if (_check_display_result(parent_result, display_type) or
-                        display_type ==
-                        ResultDisplayType.DISPLAY_OVERALL_ONLY):
-
-                    # build the parent string
-                    parent_string = _build_result_string(
-                        res['name'],
-                        parent_result,
-                        None,
-                        "",
-                        use_color,
-                        term_colors,
-                        False,
-                        widths)
-                    print(parent_string)
-
-                    for child_string in child_results:
-                        print(child_string)
-
-        print('\n')
+            else:
+                # build the parent string
+                parent_string = _build_result_string(
+                    res.name,
+                    res.result.result,
+                    None,
+                    "",
+                    result_cells,
+                    False,
+                    name_width,
+                    result_width,
+                    confidence_width)
+                lines.append(parent_string)
+
+                for child_res in child_list:
+                    lines.append(_build_result_string(
+                        child_res.name,
+                        child_res.result.result,
+                        child_res.result.confidence,
+                        _truncate_notes(child_res.result.notes, notes_width,
+                                        notes_limit),
+                        result_cells,
+                        True,
+                        name_width,
+                        result_width,
+                        confidence_width))
+
+        lines.append('\n')
+        sys.stdout.write('\n'.join(lines) + '\n')
 
     @property
     def had_failures(self):
-        for result in self._results:
-            if isinstance(result['result'], TestResult):
-                if result['result'] == Result.FAIL:
-                    return True
-            elif isinstance(result['result'], GroupTestResult):
-                if result['result'].result == Result.FAIL:
-                    return True
-        return False
+        # both TestResult and GroupTestResult report their outcome as .result
+        return any(res.result.result == Result.FAIL
+                   for res in self._results)
 
     def write_csv(self, filename):
         """Create a CSV file in the specified location using the common
@@ -252,34 +370,11 @@ class TestResults:
         # Create the header row
         header_row_items = ['Test', 'Subtest', 'Result', 'Notes', 'Confidence']
 
-        rows = []
-
-        # display any errors first
-
-        for test_result in self._results:
-            if isinstance(test_result['result'], GroupTestResult):
-                for sub_result in test_result['result'].results:
-                    rows.append([
-                        test_result['name'],
-                        sub_result['name'],
-                        _result_text(sub_result['result'].result),
-                        sub_result['result'].notes,
-                        _confidence_text(sub_result['result'].confidence),
-                        ])
-            else:
-                rows.append([
-                    test_result['name'],
-                    None,
-                    _result_text(test_result['result'].result),
-                    test_result['result'].notes,
-                    _confidence_text(test_result['result'].confidence),
-                    ])
-
         try:
-            with open(filename, 'w') as csv_output:
-                writer = csv.writer(csv_output)
+            with _open_csv(filename) as csv_output:
+                writer = csv.writer(csv_output, quoting=csv.QUOTE_MINIMAL)
                 writer.writerow(header_row_items)
-                writer.writerows(rows)
+                writer.writerows(self._csv_rows())
 
         except EnvironmentError:
             logger.info("Unable to open CSV file [ %s ] for writing", filename)
@@ -298,66 +393,50 @@ class TestResults:
 
         RESULTS_MARKER = '$$$RESULTS$$$'
 
-        html_rows = ""
+        html_rows_parts = []
 
         logger.info("Preparing to write HTML file: [ %s ]", filename)
 
-        for res in self._results:
-            if isinstance(res['result'], TestResult):
+        for res, shown, child_list in self._iter_rows(display_type):
+            if not res.is_group:
                 # Handle single result case
+                if shown:
+                    html_rows_parts.append(
+                        _create_html_result_row(res, False))
 
-                # decide whether to display, based on mode
-                if (_check_display_result(res['result'].result,
-                                          display_type) or
-                        display_type ==
-                        ResultDisplayType.DISPLAY_OVERALL_ONLY):
-
-                    html_rows += _create_html_result_row(res, False)
-
-            elif isinstance(res['result'], GroupTestResult):
+            else:
                 # Handle group result case
-                child_rows = []
-                result_list = res['result'].results
-
-                for child_res in result_list:
-
-                    # check if we should display, based on the display type
-                    if _check_display_result(child_res['result'].result,
-                                             display_type):
-
-                        child_rows.append(_create_html_result_row(
-                            child_res, do_indent=True))
-
-                if (_check_display_result(res, display_type) or
-                        display_type ==
-                        ResultDisplayType.DISPLAY_OVERALL_ONLY):
-
+                if shown:
                     # build the parent string
-                    parent_row = _create_html_group_row(res)
+                    html_rows_parts.append(_create_html_group_row(res))
 
-                    html_rows += parent_row
+                for child_res in child_list:
+                    html_rows_parts.append(_create_html_result_row(
+                        child_res, do_indent=True))
 
-                for row in child_rows:
-                    html_rows += row
+        html_rows = ''.join(html_rows_parts)
 
         try:
-            temp_file = open(html_template, 'r')
-            template_content = temp_file.read()
-            temp_file.close()
+            with open(html_template, 'r') as temp_file:
+                template_content = temp_file.read()
         except EnvironmentError:
             logger.error("Unable to open template file: [ %s ]", html_template)
             return
 
-        template_content = template_content.replace(RESULTS_MARKER, html_rows)
+        # write the rows out in place of the marker, rather than building a
+        # copy of the whole document with the rows substituted
+        template_parts = template_content.split(RESULTS_MARKER)
 
         try:
-            output_file = open(filename, 'w')
+            with open(filename, 'w', OUTPUT_BUFFER_SIZE) as output_file:
+                output_file.write(template_parts[0])
+                for template_part in template_parts[1:]:
+                    output_file.write(html_rows)
+                    output_file.write(template_part)
         except EnvironmentError:
             logger.error("Unable to open output file: [ %s ] for writing",
                          filename)
         else:
-            output_file.write(template_content)
-            output_file.close()
             logger.info("Successfully wrote HTML file: [ %s ]", filename)
 
     def write_json(self, filename):
@@ -370,43 +449,58 @@ class TestResults:
         """
         logger.info("Preparing to write JSON file [ %s ]", filename)
 
-        # Get the test results into an object format that can be serialized
-        tests = []
-        for test in self._results:
+        try:
+            with open(filename, 'w', OUTPUT_BUFFER_SIZE) as json_output_file:
+                # serialize one test at a time instead of building the whole
+                # document in memory first
+                json_output_file.write('[')
+                for i, cur_test in enumerate(self._json_tests()):
+                    if i:
+                        json_output_file.write(',')
+                    # dumps uses the C encoder in one go, while dump would
+                    # encode and write every piece separately
+                    json_output_file.write(
+                        json.dumps(cur_test, separators=(',', ':')))
+                json_output_file.write(']')
+        except EnvironmentError:
+            logger.info("Unable to open JSON file [ %s ] for writing!",
+                        filename)
+        else:
+            logger.info("Writing JSON file: [ %s ] successful!", filename)
+
+    def _json_tests(self):
+        """Generate the test results in an object format that can be
+        serialized
+
+        :returns: Generator of dicts, one per test
+        """
+        for test, _, sub_results in self._iter_rows():
             cur_test = dict()
-            cur_test['name'] = test['name']
+            cur_test['name'] = test.name
 
-            if isinstance(test['result'], TestResult):
-                cur_test['result'] = _result_text(test['result'].result)
-                cur_test['notes'] = test['result'].notes
-                tests.append(cur_test)
+            if not test.is_group:
+                cur_test['result'] = _result_text(test.result.result)
+                cur_test['notes'] = test.result.notes
+                yield cur_test
 
-            elif isinstance(test['result'], GroupTestResult):
+            else:
                 results = []
-                for ind_result in test['result'].results:
+                for ind_result in sub_results:
                     cur_result = dict()
-                    cur_result['name'] = ind_result['name']
+                    cur_result['name'] = ind_result.name
                     cur_result['result'] = _result_text(
-                        ind_result['result'].result)
+                        ind_result.result.result)
 
-                    cur_result['notes'] = ind_result['result'].notes
+                    cur_result['notes'] = ind_result.result.notes
                     results.append(cur_result)
                 cur_test['result'] = results
-                tests.append(cur_test)
+                yield cur_test
 
-        try:
-            with open(filename, 'w') as json_output_file:
-                # sort keys so that we have deterministic results
-                json.dump(tests, json_output_file, indent=4)
-        except EnvironmentError:
-            logger.info("Unable to open JSON file [ %s ] for writing!",
-                        filename)
-        else:
-            logger.info("Writing JSON file: [ %s ] successful!", filename)
 
+class TestResult(object):
+    __slots__ = ('_result', '_notes', '_confidence')
 
-class TestResult():
-    def __init__(self, result, notes=None, confidence=Result.CONF_SURE):
+    def __init__(self, result, notes=None, confidence=Confidence.SURE):
         self._result = result
         self._notes = notes
         self._confidence = confidence
@@ -424,8 +518,10 @@ class TestResult():
         return self._confidence
 
 
-class GroupTestResult():
-    # GroupTestResult is a list of dicts with name and TestResult
+class GroupTestResult(object):
+    # GroupTestResult is a list of (name, TestResult) entries
+    __slots__ = ('_results_list', '_group_result')
+
     def __init__(self):
         self._results_list = list()
         self._group_result = Result.SKIP
@@ -437,16 +533,12 @@ class GroupTestResult():
         :param result: A TestResult indicating the result of the test
         :returns: -
         """
-        new_result = dict()
-        new_result['name'] = name
-        new_result['result'] = result
-
         if result.result == Result.PASS and self._group_result == Result.SKIP:
             self._group_result = Result.PASS
         elif result.result == Result.FAIL:
             self._group_result = Result.FAIL
 
-        self._results_list.append(new_result)
+        self._results_list.append(_Entry(name, result))
 
     @property
     def result(self):
@@ -468,66 +560,41 @@ class GroupTestResult():
         return len(self._results_list)
 
 
-def _build_result_string(name, result, confidence, notes, use_color,
-                         term_colors, indent, widths):
+def _build_result_string(name, result, confidence, notes, result_cells,
+                         indent, name_width, result_width, confidence_width):
         """Internal utility function to build a result string
 
         :param name: Name of test
         :param result: Enum indicating the status of the test
         :param confidence: Enum indicating the confidence of the test
         :param notes: Associated with the test
-        :param use_color: Boolean indicating whether color should be displayed
+        :param result_cells: Dict with the result column for each result
         :param indent: Boolean indicating if test name should be indented
-        :param widths: Dict with field widths
+        :param name_width: Width of the test name field
+        :param result_width: Width of the result field
+        :param confidence_width: Width of the confidence field
         :returns:
         """
 
-        name_newline_str = '\n' + ' ' * widths['TEST_NAME']
-
-        # Set the output color and text result based on test result
-        result_color = ""
-        pass_string = ""
-
-        if result == Result.PASS:
-            result_color = term_colors['pass']
-            pass_string = 'PASS'
-        elif result == Result.SKIP:
-            result_color = term_colors['skip']
-            pass_string = 'SKIP'
-        elif result == Result.FAIL:
-            result_color = term_colors['fail']
-            pass_string = 'FAIL'
-
-        conf_string = {
-            Result.CONF_SURE: '',
-            Result.CONF_GUESS: 'guess',
-            None: '',
-            }[confidence]
+        conf_string = _TERM_CONFIDENCE_TEXT[confidence]
 
         tab = '     ' if indent else ''
 
         result_string = ""
 
         # Add the test name and tab if applicable
-        result_string += '{0: <{1}}'.format(tab + name, widths['TEST_NAME'])
-
-        if len(tab + name) > widths['TEST_NAME']:
-            result_string += name_newline_str
-
-        # Add the color formatter if we are outputting color
-        if use_color:
-            result_string += result_color
+        display_name = tab + name
+        result_string += display_name.ljust(name_width)
 
-        # Add the result string
-        result_string += '{0: <{1}}'.format(pass_string, widths['TEST_RESULT'])
+        if len(display_name) > name_width:
+            # continue on the next line, lined up with the other results
+            result_string += '\n' + ' ' * name_width
 
-        # If we're outputting color, terminate the color string
-        if use_color:
-            result_string += term_colors['end']
+        # Add the result string, already padded and colored if needed
+        result_string += result_cells.get(result, ' ' * result_width)
 
         # Add the confidence string
-        result_string += '{0: <{1}}'.format(conf_string,
-                                            widths['TEST_CONFIDENCE'])
+        result_string += conf_string.ljust(confidence_width)
 
         # Add any notes
         if notes:
@@ -536,31 +603,58 @@ def _build_result_string(name, result, confidence, notes, use_color,
         return result_string
 
 
-def _check_display_result(result, display_mode):
-    """Based on the display mode and the result, determine if a result should
-    be shown.
+def _open_csv(filename):
+    """Open a file for writing with csv.writer, which expects a binary file
+    on python 2 and a text file without newline translation on python 3
 
-    :param result: The test result
-    :param display_mode: The display mode
-    :returns: True/False indicating whether the result should be shown
+    :param filename: The file to open
+    :returns: The opened file
     """
 
-    # if we're displaying everything, display
-    if display_mode == ResultDisplayType.DISPLAY_ALL:
-        return True
+    if sys.version_info[0] < 3:
+        return open(filename, 'wb', OUTPUT_BUFFER_SIZE)
+    return open(filename, 'w', OUTPUT_BUFFER_SIZE, newline='',
+                encoding='utf-8')
 
-    # if we're displaying anything which failed and this failed
-    elif(result == Result.FAIL and display_mode >=
-            ResultDisplayType.DISPLAY_FAIL_ONLY):
-        return True
 
-    # if we're displaying anything which isn't pass, and this is skip or fail
-    elif(result == Result.SKIP and display_mode >=
-            ResultDisplayType.DISPLAY_NOT_PASS):
-        return True
+def _build_result_cells(width, use_color):
+    """Build the result column of the terminal output for each result, so
+    that it doesn't have to be padded and colored again for every row
 
-    else:
-        return False
+    :param width: Width of the result column
+    :param use_color: Boolean indicating whether color should be displayed
+    :returns: Dict with the result column string for each result
+    """
+
+    if use_color:
+        term_colors = _get_term_colors()
+
+    result_cells = {}
+    for result, text in _RESULT_TEXT.items():
+        cell = text.ljust(width)
+        if use_color:
+            cell = (term_colors[_RESULT_COLOR[result]] + cell +
+                    term_colors['end'])
+        result_cells[result] = cell
+
+    return result_cells
+
+
+def _truncate_notes(notes, width, limit):
+    """Shorten notes so they don't overwhelm the terminal output
+
+    :param notes: The notes of a test result, may be None
+    :param width: Maximum length of the returned notes
+    :param limit: Length of the notes kept before '...', width - 3
+    :returns: The notes, ending with '...' if they had to be cut. If width
+    leaves no room for '...', the notes are just cut to width.
+    """
+
+    if notes and len(notes) > width:
+        if width < 3:
+            return notes[:width]
+        return notes[:limit] + '...'
+    return notes
 
 
 def _create_html_result_row(result, do_indent):
@@ -575,19 +669,18 @@ def _create_html_result_row(result, do_indent):
     # if we're indenting, set the class style to the indent style
     indent_class = " class=" + INDENT_CLASS if do_indent else ""
 
-    result_class = " class=" + _result_to_class(result['result'].result)
-
-    row_string = ""
-    row_string += "  <tr{}>\n".format(result_class)
-    row_string += "    <td{}>{}</td>\n".format(
-        indent_class, cgi.escape(result['name']))
-    row_string += "    <td{}>{}</td>\n".format(
-        result_class, _result_text(result['result'].result))
-    row_string += "    <td>{}</td>\n".format(
-        cgi.escape(result['result'].notes or ""))
-    row_string += "  </tr>\n"
+    result_class = " class=" + _result_to_class(result.result.result)
 
-    return row_string
+    return ("  <tr{result_class}>\n"
+            "    <td{indent_class}>{name}</td>\n"
+            "    <td{result_class}>{result}</td>\n"
+            "    <td>{notes}</td>\n"
+            "  </tr>\n").format(
+        result_class=result_class,
+        indent_class=indent_class,
+        name=_html_escape(result.name, quote=False),
+        result=_result_text(result.result.result),
+        notes=_html_escape(result.result.notes or "", quote=False))
 
 
 def _create_html_group_row(result):
@@ -597,33 +690,45 @@ def _create_html_group_row(result):
     :return: HTML string for the row
     """
 
-    result_class = " class=" + _result_to_class(result['result'].result)
+    result_class = " class=" + _result_to_class(result.result.result)
 
-    row_string = ""
-    row_string += "  <tr{}>\n".format(result_class)
-    row_string += "    <td>{}</td>\n".format(cgi.escape(result['name']))
-    row_string += "    <td{}>{}</td>\n".format(
-        result_class, _result_text(result['result'].result))
-    row_string += "    <td></td>\n"
-    row_string += "  </tr>\n"
-
-    return row_string
+    return ("  <tr{result_class}>\n"
+            "    <td>{name}</td>\n"
+            "    <td{result_class}>{result}</td>\n"
+            "    <td></td>\n"
+            "  </tr>\n").format(
+        result_class=result_class,
+        name=_html_escape(result.name, quote=False),
+        result=_result_text(result.result.result))
 
 
 def _result_to_class(res):
-    PASS_CLASS = "test_pass"
-    FAIL_CLASS = "test_fail"
-    SKIP_CLASS = "test_skip"
+    return _RESULT_CLASS[res]
+
 
-    mapping = {
-        Result.PASS: PASS_CLASS,
-        Result.FAIL: FAIL_CLASS,
-        Result.SKIP: SKIP_CLASS,
-    }
-    return mapping[res]
+# terminal settings don't change during a run, so they are only looked up
+# the first time a report is displayed
+_term_colors = None
+_term_width = None
 
 
 def _get_term_colors():
+    global _term_colors
+
+    if _term_colors is None:
+        _term_colors = _load_term_colors()
+    return _term_colors
+
+
+def _get_term_width():
+    global _term_width
+
+    if _term_width is None:
+        _term_width = _load_term_width()
+    return _term_width
+
+
+def _load_term_colors():
     # set bash colors - try from config and fallback to constants
     term_colors = {}
 
@@ -642,7 +747,15 @@ def _get_term_colors():
     return term_colors
 
 
-def _get_term_width():
+def _load_term_width():
+    # python 3 can query the terminal size directly, without running stty
+    if hasattr(shutil, 'get_terminal_size'):
+        return shutil.get_terminal_size((80, 24)).columns
+
+    return _stty_term_width()
+
+
+def _stty_term_width():
     # try to get the width from stty (option columns)
     try:
         term_settings = subprocess.check_output(['stty', '-a'])
@@ -651,37 +764,17 @@ def _get_term_width():
         # stty is not installed, or failed: assume 80 columns
         return 80
 
-    for line in term_settings.splitlines():
-        for setting in line.split(b';'):
-            try:
-                part1, part2 = setting.strip().split(b' ', 1)
-                # linux order
-                if part1.strip() == b'columns':
-                    return int(part2.strip())
-                # bsd order
-                elif part2.strip() == b'columns':
-                    return int(part1.strip())
-            except ValueError:
-                # unexpected format
-                continue
+    match = STTY_COLUMNS_RE.search(term_settings)
+    if match:
+        return int(match.group(1) or match.group(2))
 
     # no columns setting found in the output, so default to 80
     return 80
 
 
 def _result_text(result):
-    return_value = None
-    if result == Result.PASS:
-        return_value = "PASS"
-    elif result == Result.FAIL:
-        return_value = "FAIL"
-    elif result == Result.SKIP:
-        return_value = "SKIP"
-    return return_value
+    return _RESULT_TEXT.get(result)
 
 
 def _confidence_text(result):
-    return {
-        Result.CONF_GUESS: "guess",
-        Result.CONF_SURE: "sure",
-        }.get(result)
+    return _CONFIDENCE_TEXT.get(result)
@@ -14,6 +14,7 @@
 
 from reconbf.lib.logger import logger
 from reconbf.lib import test_class
+from reconbf.lib.result import Confidence
 from reconbf.lib.result import GroupTestResult
 from reconbf.lib.result import Result
 from reconbf.lib.result import TestResult
@@ -120,16 +121,16 @@ def _check_relro(path):
     """
     headers = _elf_prog_headers(path)
     if headers is None:
-        return (None, Result.CONF_GUESS)
+        return (None, Confidence.GUESS)
 
     if b'GNU_RELRO' in headers:
         dynamic_section = _elf_dynamic(path)
         if b'BIND_NOW' in dynamic_section:
-            return ('full', Result.CONF_SURE)
+            return ('full', Confidence.SURE)
         else:
-            return ('partial', Result.CONF_SURE)
+            return ('partial', Confidence.SURE)
 
-    return ('none', Result.CONF_SURE)
+    return ('none', Confidence.SURE)
 
 
 def _check_stack_canary(path):
@@ -144,14 +145,14 @@ def _check_stack_canary(path):
     """
     symbols = _elf_syms(path)
     if symbols is None:
-        return (None, Result.CONF_GUESS)
+        return (None, Confidence.GUESS)
 
     if b'__stack_chk_fail' in symbols:
-        return (True, Result.CONF_SURE)
+        return (True, Confidence.SURE)
 
     # with just -fstack-protector the application may not contain any functions
     # that the compiler considers worth securing
-    return (False, Result.CONF_GUESS)
+    return (False, Confidence.GUESS)
 
 
 def _check_nx(path):
@@ -163,13 +164,13 @@ def _check_nx(path):
     """
     headers = _elf_prog_headers(path)
     if headers is None:
-        return (None, Result.CONF_GUESS)
+        return (None, Confidence.GUESS)
 
     for line in headers.split(b'\n'):
         if b'GNU_STACK' in line and b'RWE' not in line:
-            return (True, Result.CONF_SURE)
+            return (True, Confidence.SURE)
 
-    return (False, Result.CONF_SURE)
+    return (False, Confidence.SURE)
 
 
 def _check_pie(path):
@@ -181,14 +182,14 @@ def _check_pie(path):
     """
     file_headers = _elf_file_headers(path)
     if file_headers is None:
-        return (None, Result.CONF_GUESS)
+        return (None, Confidence.GUESS)
 
     for line in file_headers.split(b'\n'):
         if b'Type:' in line:
             if b'EXEC' in line:
-                return (False, Result.CONF_SURE)
+                return (False, Confidence.SURE)
             elif b'DYN' in line and b'(DEBUG)' in _elf_dynamic(path):
-                return (True, Result.CONF_SURE)
+                return (True, Confidence.SURE)
             else:
                 raise ValueError(path + ' is a DSO so PIE test is invalid')
 
@@ -201,9 +202,9 @@ def _check_runpath(path):
 
     dyn = _elf_dynamic(path)
     if dyn is None:
-        return (None, Result.CONF_GUESS)
+        return (None, Confidence.GUESS)
 
-    return (b'rpath' in dyn or b'runpath' in dyn, Result.CONF_SURE)
+    return (b'rpath' in dyn or b'runpath' in dyn, Confidence.SURE)
 
 
 def _find_used_libc(path):
@@ -250,7 +251,7 @@ def _check_fortify(path):
     libc = _find_used_libc(path)
     if not libc:
         logger.debug('Unable to determine location of libc')
-        return (False, Result.CONF_GUESS)
+        return (False, Confidence.GUESS)
 
     fortified = set([])
     for addr, sym, name in _symbols_in_dynsym(libc):
@@ -260,15 +261,15 @@ def _check_fortify(path):
 
     symbols = set([name for addr, sym, name in _symbols_in_dynsym(path)])
     if len(symbols.intersection(fortified)) > 0:
-        return (True, Result.CONF_SURE)
+        return (True, Confidence.SURE)
 
     # if there are no functions to fortify, treat it the same as fortified
     if len(symbols.intersection(plain)) == 0:
-        return (True, Result.CONF_SURE)
+        return (True, Confidence.SURE)
 
     # there may be a situation where a function is used on a buffer of unknown
     # size and cannot be fortified - or it may be just not fortified
-    return (False, Result.CONF_GUESS)
+    return (False, Confidence.GUESS)
 
 
 def _extract_symbols(cmd):
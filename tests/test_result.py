@@ -0,0 +1,329 @@
+from reconbf.lib import result
+from reconbf.lib.result import Confidence
+from reconbf.lib.result import GroupTestResult
+from reconbf.lib.result import Result
+from reconbf.lib.result import ResultDisplayType
+from reconbf.lib.result import TestResult
+from reconbf.lib.result import TestResults
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from mock import Mock
+from mock import patch
+
+
+class HadFailures(unittest.TestCase):
+    def test_no_results(self):
+        self.assertFalse(TestResults([]).had_failures)
+
+    def test_single_pass(self):
+        results = TestResults([
+            {'name': 'a', 'result': TestResult(Result.PASS)},
+            {'name': 'b', 'result': TestResult(Result.SKIP)},
+        ])
+        self.assertFalse(results.had_failures)
+
+    def test_single_fail(self):
+        results = TestResults([
+            {'name': 'a', 'result': TestResult(Result.PASS)},
+            {'name': 'b', 'result': TestResult(Result.FAIL)},
+        ])
+        self.assertTrue(results.had_failures)
+
+    def test_group_fail(self):
+        group = GroupTestResult()
+        group.add_result('a', TestResult(Result.PASS))
+        group.add_result('b', TestResult(Result.FAIL))
+        results = TestResults([{'name': 'group', 'result': group}])
+        self.assertTrue(results.had_failures)
+
+
+class DisplayOnTerminal(unittest.TestCase):
+    def _display(self, results, display_type):
+        with patch.object(result, '_get_term_width', return_value=100):
+            with patch.object(sys, 'stdout') as stdout:
+                results.display_on_terminal(use_color=False,
+                                            display_type=display_type)
+        self.assertEqual(stdout.write.call_count, 1)
+        return stdout.write.call_args[0][0]
+
+    def test_not_pass(self):
+        passed_group = GroupTestResult()
+        passed_group.add_result('a', TestResult(Result.PASS))
+        failed_group = GroupTestResult()
+        failed_group.add_result('b', TestResult(Result.PASS))
+        failed_group.add_result('c', TestResult(Result.FAIL, 'bad',
+                                                Confidence.GUESS))
+        results = TestResults([
+            {'name': 'passed group', 'result': passed_group},
+            {'name': 'failed group', 'result': failed_group},
+            {'name': 'x' * 65, 'result': TestResult(Result.SKIP, 'skipped')},
+            {'name': 'long notes',
+             'result': TestResult(Result.FAIL, 'n' * 30)},
+            {'name': 'passed', 'result': TestResult(Result.PASS)},
+        ])
+
+        # 100 columns leave 20 for the notes
+        self.assertEqual(
+            self._display(results, ResultDisplayType.DISPLAY_NOT_PASS),
+            '\n\n' +
+            '=' * 100 + '\n' +
+            'Test Name'.ljust(60) + 'Result'.ljust(9) +
+            'Confidence'.ljust(11) + 'Notes\n' +
+            '=' * 100 + '\n' +
+            'failed group'.ljust(60) + 'FAIL'.ljust(9) + ' ' * 11 + '\n' +
+            '     c'.ljust(60) + 'FAIL'.ljust(9) + 'guess'.ljust(11) +
+            'bad\n' +
+            'x' * 65 + '\n' + ' ' * 60 + 'SKIP'.ljust(9) + ' ' * 11 +
+            'skipped\n' +
+            'long notes'.ljust(60) + 'FAIL'.ljust(9) + ' ' * 11 +
+            'n' * 17 + '...\n' +
+            '\n\n')
+
+    def test_overall_only(self):
+        group = GroupTestResult()
+        group.add_result('a', TestResult(Result.FAIL))
+        results = TestResults([
+            {'name': 'group', 'result': group},
+            {'name': 'passed', 'result': TestResult(Result.PASS)},
+        ])
+
+        output = self._display(results,
+                               ResultDisplayType.DISPLAY_OVERALL_ONLY)
+        self.assertEqual(output.splitlines()[5:], [
+            'group'.ljust(60) + 'FAIL'.ljust(9) + ' ' * 11,
+            'passed'.ljust(60) + 'PASS'.ljust(9) + ' ' * 11,
+            '',
+            '',
+        ])
+
+    def test_no_room_for_notes(self):
+        results = TestResults([
+            {'name': 'a', 'result': TestResult(Result.FAIL, 'n & more')},
+        ])
+
+        # 80 columns leave nothing for the notes
+        with patch.object(result, '_get_term_width', return_value=80):
+            with patch.object(sys, 'stdout') as stdout:
+                results.display_on_terminal(use_color=False)
+        output = stdout.write.call_args[0][0]
+        self.assertEqual(output.splitlines()[5],
+                         'a'.ljust(60) + 'FAIL'.ljust(9) + ' ' * 11)
+
+
+class TruncateNotes(unittest.TestCase):
+    def test_short(self):
+        self.assertEqual(result._truncate_notes('abc', 5, 2), 'abc')
+
+    def test_none(self):
+        self.assertIsNone(result._truncate_notes(None, 5, 2))
+
+    def test_cut(self):
+        self.assertEqual(result._truncate_notes('abcdefg', 5, 2), 'ab...')
+
+    def test_narrow(self):
+        self.assertEqual(result._truncate_notes('abcdefg', 2, 0), 'ab')
+        self.assertEqual(result._truncate_notes('abcdefg', 0, 0), '')
+
+
+class WriteHtml(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.template = os.path.join(self.tmp_dir, 'template.html')
+        self.output = os.path.join(self.tmp_dir, 'output.html')
+        with open(self.template, 'w') as f:
+            f.write('<table>\n$$$RESULTS$$$</table>\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_escaped_row(self):
+        results = TestResults([
+            {'name': 'a <b>', 'result': TestResult(Result.FAIL, 'x & "y"')},
+        ])
+        results.write_html(self.output, self.template)
+
+        with open(self.output) as f:
+            html = f.read()
+        self.assertEqual(html, (
+            '<table>\n'
+            '  <tr class=test_fail>\n'
+            '    <td>a &lt;b&gt;</td>\n'
+            '    <td class=test_fail>FAIL</td>\n'
+            '    <td>x &amp; "y"</td>\n'
+            '  </tr>\n'
+            '</table>\n'))
+
+    def test_failed_group(self):
+        group = GroupTestResult()
+        group.add_result('a', TestResult(Result.PASS))
+        group.add_result('b', TestResult(Result.FAIL))
+        results = TestResults([{'name': 'group', 'result': group}])
+        results.write_html(self.output, self.template)
+
+        with open(self.output) as f:
+            html = f.read()
+        self.assertEqual(html, (
+            '<table>\n'
+            '  <tr class=test_fail>\n'
+            '    <td>group</td>\n'
+            '    <td class=test_fail>FAIL</td>\n'
+            '    <td></td>\n'
+            '  </tr>\n'
+            '  <tr class=test_fail>\n'
+            '    <td class=result_indent>b</td>\n'
+            '    <td class=test_fail>FAIL</td>\n'
+            '    <td></td>\n'
+            '  </tr>\n'
+            '</table>\n'))
+
+
+class WriteCsv(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp_dir, 'output.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _read_output(self):
+        with open(self.output) as f:
+            return f.read().splitlines()
+
+    def test_results(self):
+        group = GroupTestResult()
+        group.add_result('b', TestResult(Result.FAIL, 'x, y',
+                                         Confidence.GUESS))
+        results = TestResults([
+            {'name': 'a', 'result': TestResult(Result.PASS)},
+            {'name': 'group', 'result': group},
+        ])
+        results.write_csv(self.output)
+
+        self.assertEqual(self._read_output(), [
+            'Test,Subtest,Result,Notes,Confidence',
+            'a,,PASS,,sure',
+            'group,b,FAIL,"x, y",guess',
+        ])
+
+    def test_added_results(self):
+        results = TestResults([
+            {'name': 'a', 'result': TestResult(Result.PASS)},
+        ])
+        results.write_csv(self.output)
+        results.add_results([
+            {'name': 'b', 'result': TestResult(Result.SKIP, 'skipped')},
+        ])
+        results.write_csv(self.output)
+
+        self.assertEqual(self._read_output(), [
+            'Test,Subtest,Result,Notes,Confidence',
+            'a,,PASS,,sure',
+            'b,,SKIP,skipped,sure',
+        ])
+
+    def test_changed_group(self):
+        group = GroupTestResult()
+        group.add_result('a', TestResult(Result.PASS))
+        results = TestResults([{'name': 'group', 'result': group}])
+        results.write_csv(self.output)
+        group.add_result('b', TestResult(Result.FAIL))
+        results.write_csv(self.output)
+
+        self.assertEqual(self._read_output(), [
+            'Test,Subtest,Result,Notes,Confidence',
+            'group,a,PASS,,sure',
+            'group,b,FAIL,,sure',
+        ])
+
+
+class WriteJson(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp_dir, 'output.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_results(self):
+        group = GroupTestResult()
+        group.add_result('b', TestResult(Result.FAIL, 'bad'))
+        results = TestResults([
+            {'name': 'a', 'result': TestResult(Result.PASS)},
+            {'name': 'group', 'result': group},
+        ])
+        results.write_json(self.output)
+
+        with open(self.output) as f:
+            data = json.load(f)
+        self.assertEqual(data, [
+            {'name': 'a', 'result': 'PASS', 'notes': None},
+            {'name': 'group', 'result': [
+                {'name': 'b', 'result': 'FAIL', 'notes': 'bad'},
+            ]},
+        ])
+
+    def test_unicode_and_none_notes(self):
+        group = GroupTestResult()
+        group.add_result(u'd\u00e9j\u00e0', TestResult(Result.SKIP, None))
+        results = TestResults([
+            {'name': 'a', 'result': TestResult(Result.FAIL, u'\u2603 "x"')},
+            {'name': 'b', 'result': TestResult(Result.PASS)},
+            {'name': 'group', 'result': group},
+        ])
+        results.write_json(self.output)
+
+        with open(self.output) as f:
+            data = json.load(f)
+        self.assertEqual(data, [
+            {'name': 'a', 'result': 'FAIL', 'notes': u'\u2603 "x"'},
+            {'name': 'b', 'result': 'PASS', 'notes': None},
+            {'name': 'group', 'result': [
+                {'name': u'd\u00e9j\u00e0', 'result': 'SKIP', 'notes': None},
+            ]},
+        ])
+
+    def test_no_results(self):
+        TestResults([]).write_json(self.output)
+
+        with open(self.output) as f:
+            self.assertEqual(json.load(f), [])
+
+
+class TermWidth(unittest.TestCase):
+    def test_terminal_size(self):
+        with patch.object(shutil, 'get_terminal_size', create=True,
+                          return_value=Mock(columns=132)):
+            self.assertEqual(result._load_term_width(), 132)
+
+    def test_terminal_size_missing(self):
+        stty = b'speed 38400 baud; rows 50; columns 132; line = 0;\n'
+        with patch.object(result, 'shutil', object()):
+            with patch.object(subprocess, 'check_output', return_value=stty):
+                self.assertEqual(result._load_term_width(), 132)
+
+    def test_linux(self):
+        stty = (b'speed 38400 baud; rows 50; columns 132; line = 0;\n'
+                b'intr = ^C; quit = ^\\; erase = ^?; kill = ^U;\n')
+        with patch.object(subprocess, 'check_output', return_value=stty):
+            self.assertEqual(result._stty_term_width(), 132)
+
+    def test_bsd(self):
+        stty = (b'speed 9600 baud; 50 rows; 132 columns;\n'
+                b'lflags: icanon isig iexten echo echoe -echok echoke\n')
+        with patch.object(subprocess, 'check_output', return_value=stty):
+            self.assertEqual(result._stty_term_width(), 132)
+
+    def test_no_columns(self):
+        with patch.object(subprocess, 'check_output', return_value=b''):
+            self.assertEqual(result._stty_term_width(), 80)
+
+    def test_stty_failed(self):
+        with patch.object(subprocess, 'check_output',
+                          side_effect=subprocess.CalledProcessError(1, '')):
+            self.assertEqual(result._stty_term_width(), 80)
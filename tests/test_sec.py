@@ -50,9 +50,9 @@ class SysctlValues(unittest.TestCase):
     def test_without_description(self):
         with patch.object(utils, 'get_sysctl_value', return_value="foo"):
             res = test_sec.test_sysctl_values({"x": ("match", "foo")})
-        self.assertEqual(res.results[0]['name'], "x")
+        self.assertEqual(res.results[0].name, "x")
 
     def test_with_description(self):
         with patch.object(utils, 'get_sysctl_value', return_value="foo"):
             res = test_sec.test_sysctl_values({"x": ("match", "foo", "bar")})
-        self.assertEqual(res.results[0]['name'], "bar")
+        self.assertEqual(res.results[0].name, "bar")